@@ -5,9 +5,8 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
-from sklearn.linear_model import LinearRegression
-from sklearn.preprocessing import PolynomialFeatures
-from sklearn.pipeline import make_pipeline
+from numba import njit
+import io
 import os
 
 # Set page config
@@ -30,31 +29,88 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+# Columns used by the dashboard (only these are parsed and cached)
+COLS_TO_LOAD = [
+    'date', 'location', 'continent', 'population',
+    'total_cases', 'new_cases', 'new_cases_smoothed',
+    'total_deaths', 'new_deaths', 'new_deaths_smoothed',
+    'total_cases_per_million', 'total_deaths_per_million',
+    'total_vaccinations', 'people_vaccinated', 'people_fully_vaccinated',
+    'people_fully_vaccinated_per_hundred',
+    'icu_patients', 'hosp_patients', 'weekly_icu_admissions',
+    'population_density', 'median_age', 'aged_65_older',
+    'gdp_per_capita', 'life_expectancy'
+]
+
+# Raw counts that are summed and shown as exact integers; float32 only holds
+# integers exactly up to 2**24, so these stay float64
+COUNT_COLS = [
+    'population', 'total_cases', 'new_cases', 'total_deaths', 'new_deaths',
+    'total_vaccinations', 'people_vaccinated', 'people_fully_vaccinated'
+]
+
+# Maximum points per plotted series; longer series are downsampled with LTTB
+MAX_PLOT_POINTS = 2000
+
 # Load and preprocess data
 @st.cache_data
 def load_data():
     try:
         data_path = os.path.join('data', 'owid-covid-data.csv')
+        parquet_path = os.path.join('data', 'owid-covid-data.parquet')
         if not os.path.exists(data_path):
             st.error(f"Data file not found at: {os.path.abspath(data_path)}")
             return None
             
-        df = pd.read_csv(data_path)
-        df['date'] = pd.to_datetime(df['date'])
+        # Parse the CSV once and reuse the Parquet copy until the CSV changes
+        use_cache = (os.path.exists(parquet_path) and
+                     os.path.getmtime(parquet_path) >= os.path.getmtime(data_path))
+        if use_cache:
+            try:
+                df = pd.read_parquet(parquet_path, engine='pyarrow', columns=COLS_TO_LOAD)
+            except Exception as e:
+                # e.g. a cache written with an older column list; rebuild it from the CSV
+                st.warning(f"Ignoring unreadable data cache ({type(e).__name__}), re-reading the CSV")
+                use_cache = False
+        if not use_cache:
+            df = pd.read_csv(data_path, usecols=COLS_TO_LOAD, parse_dates=['date'], date_format='%Y-%m-%d')
+        
+        # Downcast numeric columns (float32 is plenty for rates and per-capita figures)
+        float_cols = df.select_dtypes('float64').columns.difference(COUNT_COLS)
+        df[float_cols] = df[float_cols].astype(np.float32)
+        int_cols = df.select_dtypes('int64').columns
+        df[int_cols] = df[int_cols].apply(pd.to_numeric, downcast='integer')
         
-        # Calculate additional metrics with error handling
-        df['mortality_rate'] = (df['total_deaths'] / df['total_cases']) * 100
+        # Low-cardinality labels as categoricals so filters and groupbys compare int codes
+        df['location'] = df['location'].astype('category')
+        df['continent'] = df['continent'].astype('category')
         
-        # Calculate recovery rate (approximate if recoveries data isn't available)
+        if not use_cache:
+            # The cache only speeds up later loads, so failing to write it is not fatal
+            try:
+                df.to_parquet(parquet_path, engine='pyarrow', compression='zstd', index=False)
+            except Exception as e:
+                st.warning(f"Could not write data cache: {str(e)}")
+        
+        # Calculate additional metrics on the raw arrays, reusing intermediates
+        total_cases = df['total_cases'].to_numpy()
+        total_deaths = df['total_deaths'].to_numpy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mortality_rate = total_deaths / total_cases
+        mortality_rate *= 100
+        df['mortality_rate'] = mortality_rate
+        
+        # Recovery rate is (cases - deaths) / cases, i.e. the complement of mortality
+        df['recovery_rate'] = 100 - mortality_rate
+        
+        active_cases = total_cases - total_deaths
         if 'total_recoveries' in df.columns:
-            df['recovery_rate'] = (df['total_cases'] - df['total_deaths']) / df['total_cases'] * 100
-            df['active_cases'] = df['total_cases'] - df['total_deaths'] - df['total_recoveries']
-        else:
-            # If recoveries data isn't available, estimate active cases
-            df['recovery_rate'] = (df['total_cases'] - df['total_deaths']) / df['total_cases'] * 100
-            df['active_cases'] = df['total_cases'] - df['total_deaths']
-            
-        df['case_fatality_ratio'] = (df['total_deaths'] / df['total_cases']) * 100
+            active_cases -= df['total_recoveries'].to_numpy()
+        # If recoveries data isn't available, active cases are estimated
+        df['active_cases'] = active_cases
+        
+        # Same formula as mortality_rate
+        df['case_fatality_ratio'] = df['mortality_rate']
         
         # Add wave detection with error handling
         try:
@@ -67,42 +123,168 @@ def load_data():
         st.error(f"Error loading data: {str(e)}\n\nPlease ensure the data file exists at: {os.path.abspath(data_path) if 'data_path' in locals() else 'data/owid-covid-data.csv'}")
         return None
 
+@njit(cache=True)
+def _rolling_mean_by_group(values, group_starts, group_lens, w, out):
+    """Trailing moving average over contiguous groups using a running sum (NaNs skipped)"""
+    for g in range(group_starts.shape[0]):
+        start = group_starts[g]
+        running_sum = 0.0
+        count = 0
+        for i in range(group_lens[g]):
+            value = values[start + i]
+            if not np.isnan(value):
+                running_sum += value
+                count += 1
+            if i >= w:
+                dropped = values[start + i - w]
+                if not np.isnan(dropped):
+                    running_sum -= dropped
+                    count -= 1
+            if count > 0:
+                out[start + i] = running_sum / count
+            else:
+                running_sum = 0.0
+                out[start + i] = np.nan
+
 def detect_waves(df, window=30):
     """Detect COVID-19 waves based on new cases"""
     df = df.sort_values(['location', 'date'])
-    df['new_cases_ma'] = df.groupby('location')['new_cases'].transform(
-        lambda x: x.rolling(window=window, min_periods=1).mean()
-    )
-    df['wave'] = df.groupby('location')['new_cases_ma'].transform(
-        lambda x: (x.diff() > 0).cumsum()
-    )
+    
+    # Rows are now contiguous per location; find each group's slice
+    locations = df['location'].to_numpy()
+    boundaries = np.flatnonzero(locations[1:] != locations[:-1]) + 1
+    group_starts = np.concatenate(([0], boundaries)).astype(np.int64)
+    group_lens = np.diff(np.append(group_starts, len(df))).astype(np.int64)
+    
+    values = np.ascontiguousarray(df['new_cases'].to_numpy(dtype=np.float64, na_value=np.nan))
+    new_cases_ma = np.empty_like(values)
+    _rolling_mean_by_group(values, group_starts, group_lens, window, new_cases_ma)
+    df['new_cases_ma'] = new_cases_ma
+    
+    rising = df.groupby('location', sort=False, observed=True)['new_cases_ma'].diff() > 0
+    df['wave'] = rising.groupby(df['location'], sort=False, observed=True).cumsum()
     return df
 
-def train_prediction_model(df, country, metric='new_cases', days=30):
+@njit(cache=True)
+def _lttb_indices(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: index of the most prominent point per bucket"""
+    n = x.shape[0]
+    out = np.empty(n_out, dtype=np.int64)
+    out[0] = 0
+    out[n_out - 1] = n - 1
+    bucket_size = (n - 2) / (n_out - 2)
+    prev = 0
+    for b in range(n_out - 2):
+        start = int(b * bucket_size) + 1
+        end = int((b + 1) * bucket_size) + 1
+        next_end = min(int((b + 2) * bucket_size) + 1, n)
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        chosen = start
+        max_area = -1.0
+        for j in range(start, end):
+            area = abs((x[prev] - avg_x) * (y[j] - y[prev]) -
+                       (x[prev] - x[j]) * (avg_y - y[prev]))
+            if area > max_area:
+                max_area = area
+                chosen = j
+        out[b + 1] = chosen
+        prev = chosen
+    return out
+
+def lttb(x, y, n_out=MAX_PLOT_POINTS):
+    """Return the indices of at most n_out points that preserve the shape of a series"""
+    x = np.asarray(x)
+    if x.dtype.kind == 'M':
+        x = x.astype(np.int64)
+    x = x.astype(np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    
+    # Missing values cannot be ranked, so only valid points are candidates
+    valid = np.flatnonzero(~np.isnan(y))
+    if len(valid) <= n_out:
+        return valid
+    return valid[_lttb_indices(x[valid], y[valid], n_out)]
+
+def downsample(frame, metric, n_out=MAX_PLOT_POINTS, by='location'):
+    """Downsample each series in frame (grouped by `by`) to at most n_out points for plotting"""
+    parts = []
+    for _, sub in frame.groupby(by, sort=False, observed=True):
+        if len(sub) > n_out:
+            sub = sub.iloc[lttb(sub['date'].to_numpy(), sub[metric].to_numpy(), n_out)]
+        parts.append(sub)
+    return pd.concat(parts) if parts else frame
+
+@st.cache_resource
+def by_location(df):
+    """Split the data into per-country frames for O(1) lookup"""
+    return {loc: sub.reset_index(drop=True) for loc, sub in df.groupby('location', sort=False, observed=True)}
+
+@st.cache_data(show_spinner=False)
+def get_filtered(countries, start_date, end_date):
+    """Rows for the selected countries within the date range"""
+    df = load_data()
+    country_frames = by_location(df)
+    if countries:
+        filtered_df = pd.concat([country_frames[c] for c in countries], ignore_index=True)
+    else:
+        filtered_df = df.iloc[0:0]
+    return filtered_df[
+        filtered_df['date'].between(pd.to_datetime(start_date), pd.to_datetime(end_date))
+    ]
+
+@st.cache_data(show_spinner=False)
+def get_latest(countries, start_date, end_date):
+    """Most recent row of each country in the filtered data"""
+    filtered_df = get_filtered(countries, start_date, end_date)
+    return filtered_df.sort_values('date').groupby('location', sort=False, observed=True).tail(1)
+
+@st.cache_data(show_spinner=False)
+def get_latest_global():
+    """Most recent row of each country, including ones that stopped reporting"""
+    df = load_data()
+    return df.sort_values('date').groupby('location', sort=False, observed=True).tail(1)
+
+@st.cache_data(show_spinner=False)
+def _series_for(country, metric):
+    """Dates and non-missing values of one country's metric"""
+    country_df = by_location(load_data())[country].dropna(subset=[metric])
+    return country_df['date'].to_numpy(), country_df[metric].to_numpy(dtype=np.float64)
+
+@st.cache_resource
+def base_choropleth(locations):
+    """World map for the given countries; callers fill in the color values"""
+    fig = go.Figure(go.Choropleth(
+        locations=list(locations),
+        locationmode='country names',
+        z=np.zeros(len(locations)),
+        colorscale='Viridis'
+    ))
+    fig.update_layout(margin={'t': 60})
+    return fig
+
+@st.cache_data(show_spinner=False)
+def train_prediction_model(country, metric='new_cases', days=30):
     """Train a simple prediction model"""
     try:
-        country_df = df[df['location'] == country].dropna(subset=[metric])
-        if len(country_df) < 10:
+        dates, values = _series_for(country, metric)
+        if len(values) < 10:
             return None
             
-        X = np.arange(len(country_df)).reshape(-1, 1)
-        y = country_df[metric].values
+        y = np.ascontiguousarray(values)
+        x = np.arange(len(y), dtype=np.float64)
         
-        # Use polynomial regression
-        model = make_pipeline(
-            PolynomialFeatures(degree=3),
-            LinearRegression()
-        )
-        model.fit(X, y)
+        # Use cubic polynomial regression (least-squares fit)
+        coeffs = np.polynomial.polynomial.polyfit(x, y, 3)
         
         # Predict next 'days' days
-        future_X = np.arange(len(country_df), len(country_df) + days).reshape(-1, 1)
+        future_x = np.arange(len(y), len(y) + days, dtype=np.float64)
         future_dates = pd.date_range(
-            start=country_df['date'].iloc[-1],
+            start=dates[-1],
             periods=days + 1
         )[1:]
         
-        predictions = model.predict(future_X)
+        predictions = np.polynomial.polynomial.polyval(future_x, coeffs)
         return future_dates, predictions
     except:
         return None
@@ -153,10 +335,8 @@ def main():
     
     # Filter data
     start_date, end_date = date_range if len(date_range) == 2 else (min_date, max_date)
-    filtered_df = df[
-        (df['location'].isin(selected_countries)) & 
-        (df['date'].between(pd.to_datetime(start_date), pd.to_datetime(end_date)))
-    ]
+    country_frames = by_location(df)
+    filtered_df = get_filtered(tuple(selected_countries), start_date, end_date)
     
     # Main tabs
     tab1, tab2, tab3, tab4 = st.tabs([
@@ -170,14 +350,14 @@ def main():
         st.header("Key Metrics")
         col1, col2, col3, col4 = st.columns(4)
         
-        latest_data = filtered_df[filtered_df['date'] == filtered_df['date'].max()]
+        latest_data = get_latest(tuple(selected_countries), start_date, end_date)
         
         with col1:
             st.metric("Total Countries", len(selected_countries))
         with col2:
             st.metric("Date Range", f"{start_date.strftime('%b %d, %Y')} to {end_date.strftime('%b %d, %Y')}")
         with col3:
-            st.metric("Latest Data", latest_data['date'].iloc[0].strftime('%b %d, %Y'))
+            st.metric("Latest Data", latest_data['date'].max().strftime('%b %d, %Y'))
         with col4:
             if selected_metric in latest_data.columns:
                 total = latest_data[selected_metric].sum()
@@ -186,10 +366,11 @@ def main():
         # Time series chart
         st.subheader("Time Series Analysis")
         fig = px.line(
-            filtered_df,
+            downsample(filtered_df, selected_metric),
             x='date',
             y=selected_metric,
             color='location',
+            render_mode='webgl',
             title=f"{selected_metric.replace('_', ' ').title()} Over Time",
             labels={'date': 'Date', selected_metric: selected_metric.replace('_', ' ').title()},
             hover_data={
@@ -210,16 +391,22 @@ def main():
         )
         
         if metrics_to_compare:
-            fig = go.Figure()
-            for metric in metrics_to_compare:
-                for country in selected_countries:
-                    country_data = filtered_df[filtered_df['location'] == country]
-                    fig.add_trace(go.Scatter(
-                        x=country_data['date'],
-                        y=country_data[metric],
-                        name=f"{country} - {metric.replace('_', ' ').title()}",
-                        mode='lines'
-                    ))
+            long_df = filtered_df.melt(
+                id_vars=['date', 'location'],
+                value_vars=metrics_to_compare,
+                var_name='metric',
+                value_name='value'
+            )
+            metric_titles = {m: m.replace('_', ' ').title() for m in metrics_to_compare}
+            long_df['series'] = long_df['location'].astype(str) + ' - ' + long_df['metric'].map(metric_titles)
+            fig = px.line(
+                downsample(long_df, 'value', by='series'),
+                x='date',
+                y='value',
+                color='series',
+                render_mode='webgl',
+                labels={'series': ''}
+            )
             fig.update_layout(
                 title="Multiple Metrics Comparison",
                 xaxis_title="Date",
@@ -237,30 +424,40 @@ def main():
         
         if st.button("Generate Prediction"):
             with st.spinner("Training prediction model..."):
-                future_dates, predictions = train_prediction_model(
-                    df, pred_country, selected_metric
-                )
+                prediction = train_prediction_model(pred_country, selected_metric)
                 
-                if future_dates is not None:
-                    # Get historical data
-                    hist_data = filtered_df[filtered_df['location'] == pred_country]
+                if prediction is not None:
+                    future_dates, predictions = prediction
+                    
+                    # Get historical data from the country's own frame, limited to the date range
+                    country_df = country_frames[pred_country]
+                    hist_data = country_df[
+                        country_df['date'].between(pd.to_datetime(start_date), pd.to_datetime(end_date))
+                    ]
+                    hist_plot = hist_data
+                    if len(hist_plot) > MAX_PLOT_POINTS:
+                        hist_plot = hist_plot.iloc[
+                            lttb(hist_plot['date'].to_numpy(), hist_plot[selected_metric].to_numpy())
+                        ]
                     
                     # Create figure
                     fig = go.Figure()
                     
                     # Add historical data
-                    fig.add_trace(go.Scatter(
-                        x=hist_data['date'],
-                        y=hist_data[selected_metric],
+                    fig.add_trace(go.Scattergl(
+                        x=hist_plot['date'],
+                        y=hist_plot[selected_metric],
                         name='Historical Data',
+                        mode='lines',
                         line=dict(color='blue')
                     ))
                     
                     # Add prediction
-                    fig.add_trace(go.Scatter(
+                    fig.add_trace(go.Scattergl(
                         x=future_dates,
                         y=predictions,
                         name='Prediction',
+                        mode='lines',
                         line=dict(color='red', dash='dash')
                     ))
                     
@@ -294,24 +491,28 @@ def main():
         st.subheader("Pandemic Wave Analysis")
         wave_country = st.selectbox("Select Country for Wave Analysis", selected_countries)
         
-        wave_data = df[df['location'] == wave_country].copy()
+        wave_data = country_frames.get(wave_country, df.iloc[0:0])
         if not wave_data.empty:
             fig = px.line(
                 wave_data,
                 x='date',
                 y='new_cases_ma',
+                render_mode='webgl',
                 title=f"COVID-19 Waves in {wave_country}",
                 labels={'new_cases_ma': '7-Day Moving Average of New Cases', 'date': 'Date'}
             )
             
             # Add wave annotations
             waves = wave_data.groupby('wave')['date'].agg(['min', 'max'])
-            for _, wave in waves.iterrows():
-                fig.add_vrect(
-                    x0=wave['min'], x1=wave['max'],
+            fig.update_layout(shapes=[
+                dict(
+                    type="rect", xref="x", yref="paper",
+                    x0=wave['min'], x1=wave['max'], y0=0, y1=1,
                     fillcolor="lightgray", opacity=0.2,
                     layer="below", line_width=0
                 )
+                for wave in waves.to_dict('records')
+            ])
             
             st.plotly_chart(fig, use_container_width=True)
     
@@ -320,22 +521,22 @@ def main():
         
         # World map
         st.subheader("Global Distribution")
-        latest_global = df[df['date'] == df['date'].max()]
+        latest_global = get_latest_global()
         
-        fig = px.choropleth(
-            latest_global,
-            locations='location',
-            locationmode='country names',
-            color=selected_metric,
-            hover_name='location',
-            color_continuous_scale='Viridis',
-            title=f'Global {selected_metric.replace("_", " ").title()} as of {latest_global["date"].iloc[0].strftime("%b %d, %Y")}',
-            labels={selected_metric: selected_metric.replace('_', ' ').title()},
-            hover_data={
-                selected_metric: ':.2f',
-                'population': ':,.0f',
-                'date': False
-            }
+        # Start from the cached map and only swap in the selected metric
+        metric_title = selected_metric.replace('_', ' ').title()
+        fig = go.Figure(base_choropleth(tuple(latest_global['location'].astype(str))))
+        fig.update_traces(
+            z=latest_global[selected_metric].to_numpy(),
+            customdata=latest_global[['population']].to_numpy(),
+            colorbar_title_text=metric_title,
+            hovertemplate=(
+                '<b>%{location}</b><br>' + metric_title + '=%{z:.2f}'
+                '<br>Population=%{customdata[0]:,.0f}<extra></extra>'
+            )
+        )
+        fig.update_layout(
+            title=f'Global {metric_title} as of {latest_global["date"].max().strftime("%b %d, %Y")}'
         )
         st.plotly_chart(fig, use_container_width=True)
         
@@ -392,12 +593,21 @@ def main():
         )
         
         # Export options
-        export_format = st.selectbox("Select Export Format", ['CSV', 'Excel', 'JSON'])
+        export_format = st.selectbox("Select Export Format", ['Parquet', 'CSV', 'Excel', 'JSON'])
         filename = st.text_input("Filename", "covid19_data_export")
         
         if st.button("Export Data"):
             try:
-                if export_format == 'CSV':
+                if export_format == 'Parquet':
+                    buffer = io.BytesIO()
+                    filtered_df.to_parquet(buffer, engine='pyarrow', compression='zstd', index=False)
+                    st.download_button(
+                        label="Download Parquet",
+                        data=buffer.getvalue(),
+                        file_name=f"{filename}.parquet",
+                        mime="application/octet-stream"
+                    )
+                elif export_format == 'CSV':
                     csv = filtered_df.to_csv(index=False)
                     st.download_button(
                         label="Download CSV",
@@ -406,14 +616,15 @@ def main():
                         mime="text/csv"
                     )
                 elif export_format == 'Excel':
-                    excel = filtered_df.to_excel(f"{filename}.xlsx", index=False)
-                    with open(f"{filename}.xlsx", "rb") as f:
-                        st.download_button(
-                            label="Download Excel",
-                            data=f,
-                            file_name=f"{filename}.xlsx",
-                            mime="application/vnd.ms-excel"
-                        )
+                    buffer = io.BytesIO()
+                    with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
+                        filtered_df.to_excel(writer, index=False)
+                    st.download_button(
+                        label="Download Excel",
+                        data=buffer.getvalue(),
+                        file_name=f"{filename}.xlsx",
+                        mime="application/vnd.ms-excel"
+                    )
                 elif export_format == 'JSON':
                     json_data = filtered_df.to_json(orient="records")
                     st.download_button(
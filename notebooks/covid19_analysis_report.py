@@ -7,6 +7,8 @@ This notebook provides a comprehensive analysis of global COVID-19 data, focusin
 # 1. Import Required Libraries
 import pandas as pd
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # figures are only saved to disk, no GUI needed
 import matplotlib.pyplot as plt
 import seaborn as sns
 import plotly.express as px
@@ -61,8 +63,7 @@ COLS_TO_LOAD = [
     'icu_patients', 'hosp_patients'
 ]
 
-df = pd.read_csv(DATA_PATH, usecols=COLS_TO_LOAD)
-df['date'] = pd.to_datetime(df['date'])
+df = pd.read_csv(DATA_PATH, usecols=COLS_TO_LOAD, parse_dates=['date'], date_format='%Y-%m-%d')
 
 # Select key countries for analysis
 COUNTRIES = ['United States', 'India', 'Brazil', 'United Kingdom', 'Kenya']
@@ -75,8 +76,11 @@ df['fully_vaccinated_rate'] = (df['people_fully_vaccinated'] / df['population'])
 if 'hosp_patients' in df.columns and 'total_cases' in df.columns:
     df['hosp_rate'] = (df['hosp_patients'] / df['total_cases']) * 100
 
-# Get latest data for each country
-latest_data = df.sort_values('date').groupby('location').last().reset_index()
+# Get latest data for each country (last non-missing value of each column).
+# OWID rows are already in date order per country, so only sort if they are not
+if not df.groupby('location', sort=False)['date'].is_monotonic_increasing.all():
+    df = df.sort_values(['location', 'date'])
+latest_data = df.groupby('location').last().reset_index()
 
 # 3. Critical Indicators Analysis
 print("\n=== Critical Indicators ===")
@@ -103,26 +107,21 @@ os.makedirs('../figures', exist_ok=True)
 
 # 4.1 Death Rate Comparison
 plt.figure(figsize=(16, 9), facecolor='#F5F5F5')
-ax = sns.barplot(x='location', y='death_rate', data=death_rate_summary, 
-                 palette=[color_map[loc] for loc in death_rate_summary['location']])
+ax = sns.barplot(x='location', y='death_rate', hue='location', data=death_rate_summary, 
+                 palette=[color_map[loc] for loc in death_rate_summary['location']],
+                 dodge=False, legend=False)
 
 # Add value labels on top of bars
-for p in ax.patches:
-    ax.annotate(f"{p.get_height():.2f}%", 
-                (p.get_x() + p.get_width() / 2., p.get_height()),
-                ha='center', va='center',
-                xytext=(0, 10),
-                textcoords='offset points',
-                fontsize=12,
-                fontweight='bold',
-                color='#333333')
+for container in ax.containers:
+    ax.bar_label(container, fmt='%.2f%%', padding=3,
+                 fontsize=12, fontweight='bold', color='#333333')
 plt.title('COVID-19 Death Rate by Country (%)')
 plt.xlabel('Country')
 plt.ylabel('Death Rate (%)')
 plt.xticks(rotation=45)
 plt.tight_layout()
 plt.savefig('../figures/death_rate_comparison.png')
-plt.show()
+plt.close()
 
 # 4.2 Vaccination Coverage
 vaccination_melted = vaccination_summary.melt(id_vars='location', 
@@ -140,15 +139,9 @@ ax = sns.barplot(x='location', y='Percentage', hue='Metric', data=vaccination_me
                  palette=['#FF2E63', '#08D9D6'])
 
 # Add value labels on top of bars
-for p in ax.patches:
-    ax.annotate(f"{p.get_height():.1f}%", 
-                (p.get_x() + p.get_width() / 2., p.get_height()),
-                ha='center', va='center',
-                xytext=(0, 10),
-                textcoords='offset points',
-                fontsize=11,
-                fontweight='bold',
-                color='#333333')
+for container in ax.containers:
+    ax.bar_label(container, fmt='%.1f%%', padding=3,
+                 fontsize=11, fontweight='bold', color='#333333')
 plt.title('Vaccination Coverage by Country (%)')
 plt.xlabel('Country')
 plt.ylabel('Percentage of Population (%)')
@@ -156,41 +149,43 @@ plt.xticks(rotation=45)
 plt.legend(title='Vaccination Status')
 plt.tight_layout()
 plt.savefig('../figures/vaccination_coverage.png')
-plt.show()
+plt.close()
 
 # 4.3 Time Series of Key Metrics
 metrics = ['total_cases', 'total_deaths', 'people_vaccinated']
 titles = ['Total Cases', 'Total Deaths', 'People Vaccinated']
 
-for metric, title in zip(metrics, titles):
-    plt.figure(figsize=(18, 9), facecolor='#F5F5F5')
-    ax = plt.gca()
+# Split by country once and reuse the frames for every panel
+country_frames = {country: df[df['location'] == country] for country in COUNTRIES}
+
+fig, axes = plt.subplots(3, 1, figsize=(18, 27), facecolor='#F5F5F5')
+for ax, metric, title in zip(axes, metrics, titles):
     ax.set_facecolor('#FFFFFF')
     
     # Plot each country with distinct color and thicker line
     for country in COUNTRIES:
-        country_data = df[df['location'] == country]
-        plt.plot(country_data['date'], country_data[metric], 
+        country_data = country_frames[country]
+        ax.plot(country_data['date'], country_data[metric], 
                 label=country,
                 linewidth=3,
                 color=color_map[country])
     
     # Add grid for better readability
-    plt.grid(True, linestyle='--', alpha=0.7)
+    ax.grid(True, linestyle='--', alpha=0.7)
     
     # Customize legend
-    legend = plt.legend(facecolor='white', edgecolor='#DDDDDD', framealpha=1)
+    legend = ax.legend(facecolor='white', edgecolor='#DDDDDD', framealpha=1)
     for text in legend.get_texts():
         text.set_fontweight('bold')
     
-    plt.title(f'{title} Over Time')
-    plt.xlabel('Date')
-    plt.ylabel(title)
-    plt.legend()
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    plt.savefig(f'../figures/{metric.lower().replace(" ", "_")}_over_time.png')
-    plt.show()
+    ax.set_title(f'{title} Over Time')
+    ax.set_xlabel('Date')
+    ax.set_ylabel(title)
+    ax.tick_params(axis='x', labelrotation=45)
+
+fig.tight_layout()
+fig.savefig('../figures/key_metrics_over_time.png')
+plt.close(fig)
 
 # 5. Correlation Analysis
 print("\nPerforming correlation analysis...")
@@ -198,7 +193,12 @@ correlation_metrics = [
     'death_rate', 'vaccination_rate', 'median_age', 
     'gdp_per_capita', 'life_expectancy', 'human_development_index'
 ]
-corr_data = latest_data[correlation_metrics].corr()
+# Drop incomplete rows once, then correlate the contiguous matrix in one BLAS call
+corr_values = np.ascontiguousarray(
+    latest_data[correlation_metrics].dropna().to_numpy(dtype=np.float32)
+)
+corr_data = pd.DataFrame(np.corrcoef(corr_values, rowvar=False),
+                         index=correlation_metrics, columns=correlation_metrics)
 
 plt.figure(figsize=(14, 12), facecolor='#F5F5F5')
 ax = plt.gca()
@@ -231,7 +231,7 @@ plt.title('Correlation Matrix of Key Metrics',
 plt.title('Correlation Matrix of Key Metrics')
 plt.tight_layout()
 plt.savefig('../figures/correlation_matrix.png')
-plt.show()
+plt.close()
 
 # 6. Key Insights and Recommendations
 print("\n=== Key Insights and Recommendations ===\n")
@@ -7,20 +7,27 @@ A comprehensive analysis of global COVID-19 data including cases, deaths, and va
 # Import required libraries
 import pandas as pd
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # render straight to files; --show switches to a GUI backend
 import matplotlib.pyplot as plt
-import seaborn as sns
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime
+from joblib import Parallel, delayed
+import argparse
 import os
 
 # Set plotting style
-plt.style.use('ggplot')
-plt.rcParams['figure.figsize'] = (12, 6)
-plt.rcParams['font.size'] = 12
+def set_plot_style():
+    """Apply the plotting style shared by all figures."""
+    plt.style.use('ggplot')
+    plt.rcParams['figure.figsize'] = (12, 6)
+    plt.rcParams['font.size'] = 12
+
+set_plot_style()
 
 # Constants
 DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'owid-covid-data.csv')
+CLEAN_CACHE_PATH = os.path.join(os.path.dirname(DATA_PATH), 'owid-covid-clean.parquet')
+FIGURES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'figures')
 COUNTRIES = ['United States', 'India', 'Brazil', 'United Kingdom', 'Kenya']
 
 # Define columns to load (only what we need)
@@ -31,12 +38,24 @@ COLS_TO_LOAD = [
     'life_expectancy', 'human_development_index', 'continent'
 ]
 
+# Numeric columns are parsed straight to float32 (NaN-friendly, half the size of float64)
+COL_DTYPES = {col: 'float32' for col in COLS_TO_LOAD if col not in ('date', 'location', 'continent')}
+NUMERIC_COLS = list(COL_DTYPES)
+
 # 1. Data Loading and Initial Exploration
-def load_and_explore_data():
-    """Load and perform initial exploration of the COVID-19 dataset."""
+def load_and_explore_data(verbose=False):
+    """Load the COVID-19 dataset, printing an initial exploration if verbose is set."""
     try:
         # Load only the columns we need
-        df = pd.read_csv(DATA_PATH, usecols=COLS_TO_LOAD)
+        df = pd.read_csv(DATA_PATH, usecols=COLS_TO_LOAD, engine='pyarrow',
+                         dtype=COL_DTYPES, parse_dates=['date'])
+        
+        # Low-cardinality labels as categoricals so groupby/isin/sort work on int codes
+        df['location'] = df['location'].astype('category')
+        df['continent'] = df['continent'].astype('category')
+        
+        if not verbose:
+            return df
         
         # Display basic information
         print("\n=== Dataset Overview ===")
@@ -53,9 +72,9 @@ def load_and_explore_data():
         missing = df.isnull().sum()
         print(missing[missing > 0].sort_values(ascending=False))
         
-        # Display basic statistics
+        # Display basic statistics (single-pass reductions, no percentile sorts)
         print("\n=== Basic Statistics ===")
-        print(df.describe().to_string())
+        print(df[NUMERIC_COLS].agg(['count', 'mean', 'std', 'min', 'max']).to_string())
         
         return df
     except FileNotFoundError:
@@ -65,68 +84,102 @@ def load_and_explore_data():
         return None
 
 # 2. Data Cleaning and Preparation
+def percentage(numerator, denominator):
+    """Return numerator / denominator * 100 as float32, NaN where the denominator is not positive."""
+    num = numerator.to_numpy(dtype=np.float32)
+    den = denominator.to_numpy(dtype=np.float32)
+    out = np.full_like(den, np.nan)
+    np.divide(num, den, out=out, where=den > 0)
+    out *= 100
+    return out
+
 def clean_and_prepare_data(df):
     """Clean and prepare the COVID-19 data for analysis."""
-    # Create a copy of the dataframe
-    df_clean = df.copy()
-    
-    # Convert date column to datetime
-    df_clean['date'] = pd.to_datetime(df_clean['date'])
+    # Filter for countries of interest first so only their rows are copied
+    mask = df['location'].isin(COUNTRIES)
     
-    # Filter for countries of interest
-    df_clean = df_clean[df_clean['location'].isin(COUNTRIES)]
+    # Sort by location and date (sorting returns a new frame, no separate copy needed)
+    df_clean = df.loc[mask].sort_values(['location', 'date'])
+    # Categorical with only the selected countries, so plots don't list every
+    # location and split_by_country can search the codes
+    df_clean['location'] = df_clean['location'].astype('category').cat.remove_unused_categories()
     
-    # Sort by location and date
-    df_clean = df_clean.sort_values(['location', 'date'])
-    
-    # Forward fill missing values within each country group
-    df_clean = df_clean.groupby('location').apply(
-        lambda x: x.ffill()
-    ).reset_index(drop=True)
+    # Forward fill missing values within each country group (one grouped pass over all columns)
+    df_clean[NUMERIC_COLS] = df_clean.groupby('location', sort=False, observed=True)[NUMERIC_COLS].ffill()
+    df_clean = df_clean.reset_index(drop=True)
     
     # Calculate additional metrics
-    df_clean['death_rate'] = (df_clean['total_deaths'] / df_clean['total_cases']) * 100
-    df_clean['vaccination_rate'] = (df_clean['people_vaccinated'] / df_clean['population']) * 100
-    df_clean['fully_vaccinated_rate'] = (df_clean['people_fully_vaccinated'] / df_clean['population']) * 100
+    df_clean['death_rate'] = percentage(df_clean['total_deaths'], df_clean['total_cases'])
+    df_clean['vaccination_rate'] = percentage(df_clean['people_vaccinated'], df_clean['population'])
+    df_clean['fully_vaccinated_rate'] = percentage(df_clean['people_fully_vaccinated'], df_clean['population'])
     
     # Handle any remaining missing values
     df_clean = df_clean.dropna(subset=['date', 'location', 'total_cases', 'total_deaths'])
     
-    return df_clean
-    
-    # Filter for countries of interest
-    df_clean = df_clean[df_clean['location'].isin(COUNTRIES)]
+    # 7-day rolling average of new cases, computed per country in one grouped pass
+    df_clean['new_cases_7day_avg'] = df_clean.groupby('location', sort=False, observed=True)['new_cases'].rolling(
+        window=7
+    ).mean().reset_index(level=0, drop=True)
     
-    # Calculate additional metrics
-    df_clean['death_rate'] = (df_clean['total_deaths'] / df_clean['total_cases']) * 100
-    df_clean['vaccination_rate'] = (df_clean['people_vaccinated'] / df_clean['population']) * 100
-    df_clean['fully_vaccinated_rate'] = (df_clean['people_fully_vaccinated'] / df_clean['population']) * 100
-    
-    # Handle missing values
-    numeric_cols = df_clean.select_dtypes(include=[np.number]).columns
-    for col in numeric_cols:
-        df_clean[col] = df_clean.groupby('location')[col].transform(
-            lambda x: x.ffill()
-        )
+    return df_clean
+
+def load_cached_clean_data():
+    """Load the cleaned data from the Parquet cache if it is still valid, else return None."""
+    if not os.path.exists(CLEAN_CACHE_PATH) or not os.path.exists(DATA_PATH):
+        return None
+    if os.path.getmtime(CLEAN_CACHE_PATH) < os.path.getmtime(DATA_PATH):
+        return None
     
-    # Drop rows with missing dates or critical values
-    df_clean = df_clean.dropna(subset=['date', 'total_cases', 'total_deaths'])
+    try:
+        df_clean = pd.read_parquet(CLEAN_CACHE_PATH)
+        cached_countries = sorted(df_clean['location'].unique())
+    except Exception as e:
+        print(f"Ignoring unreadable cache {CLEAN_CACHE_PATH}: {e!r}")
+        return None
     
+    # Rebuild the cache if the list of countries has changed since it was written
+    if cached_countries != sorted(COUNTRIES):
+        return None
     return df_clean
 
-# 3. Visualization Functions
-def plot_time_series(df, metric, title, ylabel, countries=COUNTRIES, log_scale=False):
-    """Plot time series data for selected countries."""
-    plt.figure(figsize=(14, 7))
+def split_by_country(df, countries=COUNTRIES):
+    """Return a dict mapping each country to its rows as a contiguous slice of df.
     
-    for country in countries:
-        country_data = df[df['location'] == country]
-        plt.plot(country_data['date'], country_data[metric], label=country, linewidth=2)
+    df must be sorted by location (as clean_and_prepare_data leaves it), so each
+    country's block is found with two binary searches on the category codes.
+    """
+    location = df['location'].cat
+    codes = location.codes.to_numpy()
+    country_codes = location.categories.get_indexer(countries)
+    starts = np.searchsorted(codes, country_codes, side='left')
+    stops = np.searchsorted(codes, country_codes, side='right')
+    return {
+        country: df.iloc[start:stop]
+        for country, code, start, stop in zip(countries, country_codes, starts, stops)
+        if code >= 0 and stop > start
+    }
+
+def get_latest_data(df):
+    """Return the most recent row for each country."""
+    idx = df.groupby('location', sort=False, observed=True)['date'].idxmax()
+    return df.loc[idx].reset_index(drop=True)
+
+# 3. Visualization Functions
+def plot_time_series(groups, metric, title, ylabel, countries=COUNTRIES, log_scale=False):
+    """Plot time series data for selected countries (groups maps country -> its rows)."""
+    fig = plt.figure(figsize=(14, 7))
+    
+    # One column per country on a shared date index, drawn with a single plot call
+    wide = pd.concat(
+        {country: groups[country].set_index('date')[metric] for country in countries if country in groups},
+        axis=1, sort=True
+    )
+    plt.plot(wide.index.values, wide.to_numpy(), linewidth=2)
     
     plt.title(title, fontsize=16, pad=20)
     plt.xlabel('Date', fontsize=12)
     plt.ylabel(ylabel, fontsize=12)
-    plt.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
+    plt.legend(wide.columns, bbox_to_anchor=(1.05, 1), loc='upper left')
     plt.grid(True, alpha=0.3)
     plt.xticks(rotation=45)
     
@@ -135,32 +188,32 @@ def plot_time_series(df, metric, title, ylabel, countries=COUNTRIES, log_scale=F
         plt.title(f"{title} (Log Scale)")
     
     plt.tight_layout()
-    plt.show()
+    return fig
 
 def plot_bar_chart(df, x, y, title, xlabel, ylabel, figsize=(12, 6)):
     """Plot a bar chart."""
-    plt.figure(figsize=figsize)
-    ax = sns.barplot(x=x, y=y, data=df, palette='viridis')
+    import seaborn as sns  # imported lazily; only the bar and heatmap plots need it
+    
+    fig = plt.figure(figsize=figsize)
+    # Keep the row order of df (categorical columns would otherwise plot in category order)
+    order = df[x].tolist()
+    ax = sns.barplot(x=x, y=y, hue=x, data=df, order=order, hue_order=order,
+                     palette='viridis', dodge=False, legend=False)
     plt.title(title, fontsize=16, pad=20)
     plt.xlabel(xlabel, fontsize=12)
     plt.ylabel(ylabel, fontsize=12)
     plt.xticks(rotation=45)
     
-    # Add value labels on top of bars
-    for p in ax.patches:
-        ax.annotate(f'{p.get_height():.1f}', 
-                   (p.get_x() + p.get_width() / 2., p.get_height()),
-                   ha='center', va='center', 
-                   xytext=(0, 10), 
-                   textcoords='offset points')
+    # Add value labels on top of bars (one container per hue level)
+    for container in ax.containers:
+        ax.bar_label(container, fmt='%.1f', padding=3)
     
     plt.tight_layout()
-    plt.show()
+    return fig
 
-def plot_choropleth(df, metric, title, color_scale='Viridis'):
-    """Plot a choropleth map using Plotly."""
-    # Get the latest data for each country
-    latest_data = df.sort_values('date').groupby('location').last().reset_index()
+def plot_choropleth(latest_data, metric, title, color_scale='Viridis'):
+    """Plot a choropleth map of the latest data for each country using Plotly."""
+    import plotly.express as px  # imported lazily; the maps are optional
     
     fig = px.choropleth(
         latest_data,
@@ -183,71 +236,72 @@ def plot_choropleth(df, metric, title, color_scale='Viridis'):
     return fig
 
 # 4. Analysis Functions
-def analyze_trends(df):
-    """Analyze COVID-19 trends over time."""
+def analyze_trends(groups):
+    """Analyze COVID-19 trends over time and return the figures by name."""
     print("\n=== COVID-19 Trends Analysis ===")
+    figures = {}
     
     # Plot total cases over time
-    plot_time_series(
-        df, 'total_cases', 
+    figures['total_cases'] = plot_time_series(
+        groups, 'total_cases', 
         'Total COVID-19 Cases Over Time', 
         'Total Cases',
         log_scale=True
     )
     
     # Plot total deaths over time
-    plot_time_series(
-        df, 'total_deaths', 
+    figures['total_deaths'] = plot_time_series(
+        groups, 'total_deaths', 
         'Total COVID-19 Deaths Over Time', 
         'Total Deaths',
         log_scale=True
     )
     
-    # Plot daily new cases (7-day rolling average)
-    for country in COUNTRIES:
-        country_data = df[df['location'] == country].copy()
-        country_data['new_cases_7day_avg'] = country_data['new_cases'].rolling(window=7).mean()
+    # Plot daily new cases (7-day rolling average), one panel per country in a single figure
+    countries = [country for country in COUNTRIES if country in groups]
+    fig, axes = plt.subplots(len(countries), 1, figsize=(14, 7 * len(countries)), squeeze=False)
+    for ax, country in zip(axes[:, 0], countries):
+        country_data = groups[country]
         
-        plt.figure(figsize=(14, 7))
-        plt.plot(country_data['date'], country_data['new_cases_7day_avg'], 
+        ax.plot(country_data['date'], country_data['new_cases_7day_avg'], 
                 label='7-day Average', color='red', linewidth=2)
-        plt.bar(country_data['date'], country_data['new_cases'], 
+        ax.bar(country_data['date'], country_data['new_cases'], 
                alpha=0.3, label='Daily New Cases')
         
-        plt.title(f'Daily New COVID-19 Cases in {country} (7-day Average)', fontsize=16, pad=20)
-        plt.xlabel('Date', fontsize=12)
-        plt.ylabel('Number of Cases', fontsize=12)
-        plt.legend()
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        plt.show()
+        ax.set_title(f'Daily New COVID-19 Cases in {country} (7-day Average)', fontsize=16, pad=20)
+        ax.set_xlabel('Date', fontsize=12)
+        ax.set_ylabel('Number of Cases', fontsize=12)
+        ax.legend()
+        ax.tick_params(axis='x', labelrotation=45)
+    fig.tight_layout()
+    figures['daily_new_cases'] = fig
+    
+    return figures
 
-def analyze_vaccination_progress(df):
-    """Analyze vaccination progress across countries."""
+def analyze_vaccination_progress(groups, latest_data):
+    """Analyze vaccination progress across countries and return the figures by name."""
     print("\n=== Vaccination Progress Analysis ===")
+    figures = {}
     
     # Plot vaccination rates over time
-    plot_time_series(
-        df, 'vaccination_rate', 
+    figures['vaccination_rate'] = plot_time_series(
+        groups, 'vaccination_rate', 
         'COVID-19 Vaccination Rate Over Time', 
         'Percentage of Population Vaccinated (%)'
     )
     
     # Plot fully vaccinated rates
-    plot_time_series(
-        df, 'fully_vaccinated_rate', 
+    figures['fully_vaccinated_rate'] = plot_time_series(
+        groups, 'fully_vaccinated_rate', 
         'Fully Vaccinated Population Over Time', 
         'Percentage of Population Fully Vaccinated (%)'
     )
     
-    # Latest vaccination data
-    latest_data = df.sort_values('date').groupby('location').last().reset_index()
-    
-    # Sort by vaccination rate
+    # Sort latest data by vaccination rate
     latest_data = latest_data.sort_values('vaccination_rate', ascending=False)
     
     # Plot vaccination comparison
-    plot_bar_chart(
+    figures['vaccination_by_country'] = plot_bar_chart(
         latest_data, 
         x='location', 
         y='vaccination_rate',
@@ -255,26 +309,26 @@ def analyze_vaccination_progress(df):
         xlabel='Country',
         ylabel='Percentage of Population Vaccinated (%)'
     )
+    
+    return figures
 
-def analyze_death_rates(df):
-    """Analyze death rates and related factors."""
+def analyze_death_rates(groups, latest_data):
+    """Analyze death rates and related factors and return the figures by name."""
     print("\n=== Death Rate Analysis ===")
+    figures = {}
     
     # Calculate death rate over time
-    plot_time_series(
-        df, 'death_rate', 
+    figures['death_rate'] = plot_time_series(
+        groups, 'death_rate', 
         'COVID-19 Death Rate Over Time', 
         'Death Rate (% of Cases)'
     )
     
-    # Latest death rate by country
-    latest_data = df.sort_values('date').groupby('location').last().reset_index()
-    
-    # Sort by death rate
+    # Sort latest data by death rate
     latest_data = latest_data.sort_values('death_rate', ascending=False)
     
     # Plot death rate comparison
-    plot_bar_chart(
+    figures['death_rate_by_country'] = plot_bar_chart(
         latest_data, 
         x='location', 
         y='death_rate',
@@ -284,39 +338,96 @@ def analyze_death_rates(df):
     )
     
     # Correlation analysis
-    corr_data = latest_data[['death_rate', 'median_age', 'gdp_per_capita', 
-                           'life_expectancy', 'human_development_index']].corr()
+    corr_cols = ['death_rate', 'median_age', 'gdp_per_capita', 
+                 'life_expectancy', 'human_development_index']
+    values = latest_data[corr_cols].to_numpy(dtype=np.float32)
+    complete = ~np.isnan(values).any(axis=1)
+    corr_data = pd.DataFrame(np.corrcoef(values[complete], rowvar=False),
+                             index=corr_cols, columns=corr_cols)
+    
+    import seaborn as sns
     
-    plt.figure(figsize=(10, 8))
+    fig = plt.figure(figsize=(10, 8))
     sns.heatmap(corr_data, annot=True, cmap='coolwarm', center=0)
     plt.title('Correlation Matrix: Death Rate vs. Socioeconomic Factors', pad=20)
     plt.tight_layout()
-    plt.show()
+    figures['correlation_heatmap'] = fig
+    
+    return figures
+
+def _run_in_worker(analysis, *args):
+    """Run an analysis in a joblib worker process.
+    
+    Workers import pyplot afresh rather than running this module's setup, so the
+    backend and style are applied here before any figure is created.
+    """
+    matplotlib.use('Agg')
+    set_plot_style()
+    return analysis(*args)
 
 # 5. Main Analysis
-def main():
+def main(explore=False, show=False):
     """Main function to run the COVID-19 analysis."""
     print("Starting COVID-19 Global Data Analysis...")
     
-    # 1. Load and explore data
-    print("\n1. Loading and exploring data...")
-    df = load_and_explore_data()
-    
-    if df is None:
-        return
-    
-    # 2. Clean and prepare data
-    print("\n2. Cleaning and preparing data...")
-    df_clean = clean_and_prepare_data(df)
-    
-    # 3. Analyze trends
-    analyze_trends(df_clean)
-    
-    # 4. Analyze vaccination progress
-    analyze_vaccination_progress(df_clean)
-    
-    # 5. Analyze death rates
-    analyze_death_rates(df_clean)
+    if show:
+        # Let matplotlib pick the default interactive backend for this machine
+        plt.switch_backend(matplotlib.rcParamsDefault['backend'])
+    
+    # Reuse the cleaned data from a previous run if the CSV hasn't changed
+    # (unless exploring, which needs the raw data)
+    df_clean = None if explore else load_cached_clean_data()
+    if df_clean is not None:
+        print("\nUsing cached cleaned data (delete the Parquet cache to re-run steps 1-2).")
+    else:
+        # 1. Load and explore data
+        print("\n1. Loading and exploring data...")
+        df = load_and_explore_data(verbose=explore)
+        
+        if df is None:
+            return
+        
+        # 2. Clean and prepare data
+        print("\n2. Cleaning and preparing data...")
+        df_clean = clean_and_prepare_data(df)
+        try:
+            df_clean.to_parquet(CLEAN_CACHE_PATH, compression='zstd', index=False)
+        except Exception as e:
+            # The cache only speeds up later runs, so carry on without it
+            print(f"Warning: could not write cache {CLEAN_CACHE_PATH}: {e}")
+    
+    # Split by country once; the plots reuse these slices instead of re-filtering
+    groups = split_by_country(df_clean)
+    
+    # Latest row per country, shared by the bar charts, correlations and maps
+    latest_data = get_latest_data(df_clean)
+    
+    # 3-5. Analyze trends, vaccination progress and death rates. The analyses are
+    # independent, so with more than one CPU they build their figures in parallel
+    # worker processes; the figures are pickled back and saved (or shown) here in
+    # the main process. On a single CPU the worker start-up isn't worth it.
+    analyses = [
+        (analyze_trends, (groups,)),
+        (analyze_vaccination_progress, (groups, latest_data)),
+        (analyze_death_rates, (groups, latest_data)),
+    ]
+    n_jobs = min(len(analyses), os.cpu_count() or 1)
+    if n_jobs > 1:
+        results = Parallel(n_jobs=n_jobs, backend='loky')(
+            delayed(_run_in_worker)(analysis, *args) for analysis, args in analyses
+        )
+    else:
+        results = [analysis(*args) for analysis, args in analyses]
+    
+    os.makedirs(FIGURES_DIR, exist_ok=True)
+    for figures in results:
+        for name, fig in figures.items():
+            fig.savefig(os.path.join(FIGURES_DIR, f'{name}.png'), dpi=100, bbox_inches='tight')
+            if not show:
+                plt.close(fig)
+    print(f"\nFigures saved to {FIGURES_DIR}")
+    if show:
+        plt.show()
     
     # 6. Generate choropleth maps (if needed)
     print("\n=== Generating Choropleth Maps ===")
@@ -324,7 +435,7 @@ def main():
     """
     # Total cases map
     fig = plot_choropleth(
-        df_clean, 
+        latest_data, 
         'total_cases', 
         'Total COVID-19 Cases by Country',
         'Reds'
@@ -333,7 +444,7 @@ def main():
     
     # Vaccination rate map
     fig = plot_choropleth(
-        df_clean, 
+        latest_data, 
         'vaccination_rate', 
         'COVID-19 Vaccination Rate by Country',
         'Blues'
@@ -364,4 +475,10 @@ def main():
     print("\nAnalysis complete!")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="COVID-19 Global Data Analysis")
+    parser.add_argument('--explore', action='store_true',
+                        help="print the dataset overview, missing values and summary statistics")
+    parser.add_argument('--show', action='store_true',
+                        help="also display the figures in interactive windows")
+    args = parser.parse_args()
+    main(explore=args.explore, show=args.show)
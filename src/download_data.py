@@ -1,54 +1,72 @@
+import argparse
 import os
+import shutil
 import pandas as pd
 import requests
+from email.utils import formatdate, parsedate_to_datetime
 from pathlib import Path
-import zipfile
-import io
 
-def download_covid_data():
+# Our World in Data publishes the full dataset as a single CSV
+OWID_CSV_URL = 'https://covid.ourworldindata.org/data/owid-covid-data.csv'
+
+def download_covid_data(force=False):
     """
-    Download the latest COVID-19 data from Kaggle
+    Download the latest COVID-19 data from Our World in Data
+    
+    The CSV is stamped with the server's Last-Modified time, so later runs only
+    download it again when it has changed. Pass force=True to always download,
+    e.g. for a copy that came from Kaggle or a git checkout.
     """
     # Create data directory if it doesn't exist
     data_dir = Path(__file__).parent.parent / 'data'
     data_dir.mkdir(exist_ok=True)
     
-    # Kaggle dataset URL
-    kaggle_url = 'https://www.kaggle.com/datasets/kalilurrahman/covid19-coronavirus-dataset-by-owid/download?datasetVersionNumber=1'
-    
     # Local file path
-    zip_path = data_dir / 'covid19-data.zip'
     csv_path = data_dir / 'owid-covid-data.csv'
     
+    # Ask for a compressed transfer, and skip the download if our copy is current
+    headers = {'Accept-Encoding': 'gzip'}
+    if csv_path.exists() and not force:
+        headers['If-Modified-Since'] = formatdate(csv_path.stat().st_mtime, usegmt=True)
+    
     try:
-        print("Note: To download the dataset, please follow these steps:")
-        print("1. Visit: https://www.kaggle.com/datasets/kalilurrahman/covid19-coronavirus-dataset-by-owid")
-        print("2. Click the 'Download' button (requires Kaggle login)")
-        print(f"3. Save the zip file to: {zip_path}")
-        print("4. The script will extract and process the data")
-        
-        # Check if zip file exists
-        if not zip_path.exists():
-            print("\nError: Dataset zip file not found.")
-            print(f"Please download the dataset and save it as: {zip_path}")
-            return False
+        print(f"Downloading data from {OWID_CSV_URL}...")
+        with requests.get(OWID_CSV_URL, headers=headers, stream=True, timeout=60) as response:
+            if response.status_code == 304:
+                print(f"\nLocal data is already up to date: {csv_path}")
+                print("Use --force to download it again anyway.")
+                return True
+            response.raise_for_status()
             
-        # Extract the zip file
-        print(f"\nExtracting data from {zip_path}...")
-        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-            zip_ref.extractall(data_dir)
-        
-        # Check if the CSV was extracted
-        if not csv_path.exists():
-            print("Error: Could not find owid-covid-data.csv in the downloaded zip file.")
-            return False
+            # Stream straight to disk, decompressing on the fly; the partial file
+            # only replaces the existing CSV once the download has finished
+            response.raw.decode_content = True
+            tmp_path = csv_path.with_suffix('.csv.part')
+            try:
+                with open(tmp_path, 'wb') as f:
+                    shutil.copyfileobj(response.raw, f)
+            except BaseException:
+                tmp_path.unlink(missing_ok=True)
+                raise
             
-        print(f"\nData successfully extracted to: {csv_path}")
+            # Use the server's timestamp so If-Modified-Since matches its clock
+            last_modified = response.headers.get('Last-Modified')
+            if last_modified:
+                mtime = parsedate_to_datetime(last_modified).timestamp()
+                os.utime(tmp_path, (mtime, mtime))
+            tmp_path.replace(csv_path)
+        
+        # The Parquet caches are only checked for being newer than the CSV, which
+        # the server timestamp can't guarantee; drop them so they get rebuilt
+        for cache_path in data_dir.glob('*.parquet'):
+            cache_path.unlink()
+        
+        print(f"\nData successfully downloaded to: {csv_path}")
         
-        # Load and verify the data
+        # Verify the data by reading the first few rows
         try:
-            df = pd.read_csv(csv_path)
-            print(f"\nDataset loaded successfully with {len(df)} rows and {len(df.columns)} columns.")
+            df = pd.read_csv(csv_path, nrows=5)
+            print(f"\nDataset downloaded successfully with {len(df.columns)} columns.")
             print("\nFirst few rows:")
             print(df.head())
             return True
@@ -58,7 +76,7 @@ def download_covid_data():
             return False
             
     except Exception as e:
-        print(f"Error processing the dataset: {e}")
+        print(f"Error downloading the dataset: {e}")
         return False
 
 def load_covid_data():
@@ -78,4 +96,8 @@ def load_covid_data():
         return None
 
 if __name__ == "__main__":
-    download_covid_data()
+    parser = argparse.ArgumentParser(description="Download the OWID COVID-19 dataset")
+    parser.add_argument('--force', action='store_true',
+                        help="download even if the local copy looks up to date")
+    args = parser.parse_args()
+    download_covid_data(force=args.force)